@@ -2,16 +2,156 @@
 
 import base64
 import hashlib
+import json
+import os
+import ssl
 import time
-from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from threading import Lock
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3 import exceptions as urllib3_exceptions
+from requests.packages.urllib3.util.retry import Retry
+
+try:
+    from urllib.parse import quote_plus
+except ImportError:
+    from urllib import quote_plus
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    def _loads(content):
+        return json.loads(content.decode("utf-8"))
+
+# keys added to the request data when signing, never sent in the body
+_SIGNATURE_FIELDS = frozenset(('_', '_ackey', '_acsec', '_action'))
+
+# integer milliseconds, without a float round trip where time_ns exists
+if hasattr(time, "time_ns"):
+    def _milliseconds():
+        return time.time_ns() // 1000000
+else:
+    def _milliseconds():
+        return int(time.time() * 1000)
+
+# seconds that responses of slowly changing public endpoints are reused
+_CACHE_TTL = {
+    "/api/v1/public/getinstruments": 300,
+    "/api/v1/public/getcurrencies": 300,
+    "/api/v1/public/getsummary": 5,
+}
+_CACHE_MAXSIZE = 1024
+
+_monotonic = getattr(time, "monotonic", time.time)
+
+_PRIVATE_PREFIX = "/api/v1/private/"
+
+# worker threads used by place_orders
+_POOL_SIZE = 32
+
+# every endpoint used by the client, full urls are built once per client
+_ACTIONS = (
+    "/api/v1/public/getorderbook",
+    "/api/v1/public/getinstruments",
+    "/api/v1/public/getcurrencies",
+    "/api/v1/public/getlasttrades",
+    "/api/v1/public/getsummary",
+    "/api/v1/public/index",
+    "/api/v1/public/stats",
+    "/api/v1/private/account",
+    "/api/v1/private/buy",
+    "/api/v1/private/sell",
+    "/api/v1/private/cancel",
+    "/api/v1/private/cancelall",
+    "/api/v1/private/edit",
+    "/api/v1/private/getopenorders",
+    "/api/v1/private/positions",
+    "/api/v1/private/orderhistory",
+    "/api/v1/private/tradehistory",
+)
+
+
+def _encode(signature_data):
+    """ walk the sorted signature data once, producing both
+        the string to sign and the form-encoded request body.
+        the body leaves out the signature fields and None values,
+        and repeats the key for each item of a list value
+
+    :param signature_data: (dict) request data plus the signature fields
+    :return: (str, str) signature string, e.g.
+        '_=1515114174701&_ackey=KEY&...&instrument=BTC-PERPETUAL'
+        and body, e.g. 'instrument=BTC-PERPETUAL'
+    """
+    signature_parts = []
+    body_parts = []
+
+    for key, value in sorted(signature_data.items()):
+        # plain values are by far the most common, keep their path
+        # free of per-item comprehensions; list values are rare
+        if type(value) is list:
+            signature_parts.append('%s=%s' % (key, ''.join(value)))
+            if key not in _SIGNATURE_FIELDS:
+                quoted_key = quote_plus(str(key))
+                body_parts.extend([
+                    '%s=%s' % (quoted_key, quote_plus(str(item)))
+                    for item in value if item is not None
+                ])
+        else:
+            signature_parts.append('%s=%s' % (key, value))
+            if value is not None and key not in _SIGNATURE_FIELDS:
+                body_parts.append('%s=%s' % (quote_plus(str(key)), quote_plus(str(value))))
+
+    return '&'.join(signature_parts), '&'.join(body_parts)
+
+
+class DeribitAPIError(Exception):
+    """ raised when a request is rejected, either by Deribit or
+        before it is sent (e.g. missing credentials)
+    """
+
+    def __init__(self, status, body):
+        """
+        :param status: (int) HTTP status code, None if no request was sent
+        :param body: (str) response body or error message
+        """
+        super(DeribitAPIError, self).__init__(status, body)
+        self.status = status
+        self.body = body
+
+    def __str__(self):
+        if self.status is None:
+            return str(self.body)
+        return "Deribit API error {0}: {1}".format(self.status, self.body)
+
+
+class _SSLContextAdapter(HTTPAdapter):
+    """ transport adapter whose verified connections share a single
+        ssl context. requests that set their own verify (False or a
+        CA bundle path) or a client cert get plain HTTPAdapter
+        behaviour, so the shared context is never modified for them.
+        requests versions without build_connection_pool_key_attributes
+        (< 2.32) always get plain HTTPAdapter behaviour
+    """
+
+    def __init__(self, ssl_context, **kwargs):
+        self.ssl_context = ssl_context
+        super(_SSLContextAdapter, self).__init__(**kwargs)
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super(_SSLContextAdapter, self).build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        if verify is True and cert is None:
+            pool_kwargs['ssl_context'] = self.ssl_context
+        return host_params, pool_kwargs
 
 
 class RestClient(object):
     """ client to make requests to Deribit's REST API """
 
-    def __init__(self, key=None, secret=None, url=None):
+    def __init__(self, key=None, secret=None, url=None, cache=False):
         """ configure API credentials. one can find these at:
             --> https://www.deribit.com/main#/account?scrollTo=api
 
@@ -19,16 +159,58 @@ class RestClient(object):
         :param secret: (str) access secret
         :param url: (str) root url, defaults to the main site
             use this parameter to make API calls to Deribit's test net
+        :param cache: (bool) reuse recent responses of getinstruments,
+            getcurrencies (5 minutes) and getsummary (5 seconds),
+            disabled by default
         """
         self.key = key
         self.secret = secret
-        self.session = requests.Session()
+        self._sig_template_cache = {}
+        self._pool = None
+        self._pool_lock = Lock()
+        self._cache = {} if cache else None
 
         if url:
             self.url = url
         else:
             self.url = "https://www.deribit.com"
 
+        self._endpoints = dict((action, self._resolve(action)) for action in _ACTIONS)
+        self.session = self._create_session()
+
+    def _create_session(self):
+        """ build the HTTP session shared by every request of this client
+
+        :return: (requests.Session)
+        """
+        session = requests.Session()
+        # one host, many concurrent requests: a single pool with room
+        # for plenty of kept-alive connections. retries only apply to
+        # idempotent methods, so orders are never sent twice.
+        # the tls context is created once and shared by every connection
+        # verified against the same certifi bundle requests uses by default
+        adapter = _SSLContextAdapter(
+            ssl.create_default_context(cafile=requests.certs.where()),
+            pool_connections=1,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        session.mount("https://", adapter)
+
+        # requests reads proxies, the CA bundle and .netrc from the
+        # environment on every call; resolve them once for the api host
+        session.proxies.update(requests.utils.get_environ_proxies(self.url))
+        session.auth = requests.utils.get_netrc_auth(self.url)
+        session.verify = (os.environ.get("REQUESTS_CA_BUNDLE") or
+                          os.environ.get("CURL_CA_BUNDLE") or True)
+        session.trust_env = False
+        return session
+
     def request(self, action, data):
         """ perform generic request to the API
 
@@ -37,32 +219,131 @@ class RestClient(object):
         :param data: (dict) additional data to pass to this request
         :return: (str or dict) json response
         """
-        response = None
-
-        if action.startswith("/api/v1/private/"):
-            if self.key is None or self.secret is None:
-                raise Exception("Key or secret empty")
-
-            signature = self.generate_signature(action, data)
-            response = self.session.post(self.url + action, data=data, headers={'x-deribit-sig': signature},
-                                         verify=True)
+        url, private, ttl = self._route(action)
+
+        cache_key = None
+        if ttl is not None:
+            cache_key = (action, tuple(sorted(data.items())))
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return self._unpack(200, cached)
+
+        if private:
+            body, headers = self._prepare_private(action, data)
+            response = self.session.post(url, data=body, headers=headers, stream=True)
         else:
-            response = self.session.get(self.url + action, params=data, verify=True)
+            response = self.session.get(url, params=data, stream=True)
 
         if response.status_code != 200:
-            raise Exception("Wrong response code: {0}".format(response.status_code))
+            raise DeribitAPIError(response.status_code, response.text)
 
-        json = response.json()
+        content = self._read(response)
+        result = self._unpack(response.status_code, content)
+        if cache_key is not None:
+            self._cache_store(cache_key, ttl, content)
+        return result
 
-        if json["success"] == False:
-            raise Exception("Failed: " + json["message"])
+    @staticmethod
+    def _read(response):
+        """ read the whole body in one go rather than through requests'
+            chunked iter_content; the connection returns to the pool
+            once it is fully read. transport errors are re-raised as
+            the requests exceptions iter_content would raise
+
+        :param response: (requests.Response) response sent with stream=True
+        :return: (bytes) raw response body
+        """
+        try:
+            return response.raw.read(decode_content=True)
+        except urllib3_exceptions.ProtocolError as error:
+            raise requests.exceptions.ChunkedEncodingError(error)
+        except urllib3_exceptions.DecodeError as error:
+            raise requests.exceptions.ContentDecodingError(error)
+        except urllib3_exceptions.ReadTimeoutError as error:
+            raise requests.exceptions.ConnectionError(error)
+        except urllib3_exceptions.SSLError as error:
+            raise requests.exceptions.SSLError(error)
+
+    def _resolve(self, action):
+        """ work out once how requests to an endpoint are made,
+            so request() does not re-derive it on every call
 
-        if "result" in json:
-            return json["result"]
-        elif "message" in json:
-            return json["message"]
-        else:
-            return "Ok"
+        :param action: (str) the suffix of the API endpoint
+        :return: (str, bool, int) full url, whether it needs signing
+            and the cache ttl in seconds, None if responses aren't cached
+        """
+        ttl = _CACHE_TTL.get(action) if self._cache is not None else None
+        return self.url + action, action.startswith(_PRIVATE_PREFIX), ttl
+
+    def _route(self, action):
+        """ look up a resolved endpoint, resolving unknown ones on the fly
+
+        :param action: (str) the suffix of the API endpoint
+        :return: (str, bool, int) see _resolve
+        """
+        try:
+            return self._endpoints[action]
+        except KeyError:
+            return self._resolve(action)
+
+    def _cache_lookup(self, cache_key):
+        """ find an unexpired cached response
+
+        :param cache_key: (tuple) action and sorted request data
+        :return: (bytes) raw response body, None on a miss
+        """
+        entry = self._cache.get(cache_key)
+        if entry is not None and entry[0] > _monotonic():
+            return entry[1]
+        return None
+
+    def _cache_store(self, cache_key, ttl, content):
+        """ remember a response until its ttl has passed. the raw body
+            is kept and decoded again on every hit, so callers never
+            share (and can't corrupt) the same result objects
+
+        :param cache_key: (tuple) action and sorted request data
+        :param ttl: (int) seconds the response stays valid
+        :param content: (bytes) raw response body
+        """
+        if len(self._cache) >= _CACHE_MAXSIZE:
+            self._cache.clear()
+        self._cache[cache_key] = (_monotonic() + ttl, content)
+
+    def _prepare_private(self, action, data):
+        """ sign a private request
+
+        :param action: (str) the suffix of the API endpoint
+        :param data: (dict) additional data to pass to this request
+        :return: (str, dict) form-encoded body and request headers
+        """
+        if self.key is None or self.secret is None:
+            raise DeribitAPIError(None, "Key or secret empty")
+
+        signature, body = self._sign(action, data)
+        headers = {
+            'x-deribit-sig': signature,
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        return body, headers
+
+    @staticmethod
+    def _unpack(status, content):
+        """ decode a successful response and extract its result
+
+        :param status: (int) HTTP status code
+        :param content: (bytes) raw response body
+        :return: (str or dict) json response
+        """
+        reply = _loads(content)
+
+        if not reply["success"]:
+            raise DeribitAPIError(status, reply.get("message"))
+
+        try:
+            return reply["result"]
+        except KeyError:
+            return reply.get("message", "Ok")
 
     def generate_signature(self, action, data):
         """ create signature, as a function of:
@@ -74,33 +355,46 @@ class RestClient(object):
         :param data: (dict) additional data to pass to this request
         :return: (str) unicode string
         """
-        tstamp = int(time.time() * 1000)
-        signature_data = {
-            '_': tstamp,
-            '_ackey': self.key,
-            '_acsec': self.secret,
-            '_action': action
-        }
-        signature_data.update(data)
-        sorted_signature_data = OrderedDict(sorted(signature_data.items(), key=lambda t: t[0]))
+        return self._sign(action, data)[0]
 
-        def converter(data):
-            key = data[0]
-            value = data[1]
-            if isinstance(value, list):
-                return '='.join([str(key), ''.join(value)])
-            else:
-                return '='.join([str(key), str(value)])
+    def _sign(self, action, data):
+        """ create the signature and the matching form-encoded body
 
-        items = map(converter, sorted_signature_data.items())
+        :param action: (str) the suffix of the API endpoint
+        :param data: (dict) additional data to pass to this request
+        :return: (str, str) signature and request body
+        """
+        tstamp = _milliseconds()
+
+        # without extra data the signature string only varies by timestamp,
+        # which sorts first ('_'), so the encoded text around it is cached.
+        # the constant part follows the timestamp, so a precomputed sha256
+        # state can't be reused; skipping the re-encoding is what's left
+        template_key = (action, self.key, self.secret)
+        template = self._sig_template_cache.get(template_key) if not data else None
+
+        if template is not None:
+            signature_bytes = template[0] + str(tstamp).encode("ascii") + template[1]
+            body = ''
+        else:
+            signature_data = {
+                '_': tstamp,
+                '_ackey': self.key,
+                '_acsec': self.secret,
+                '_action': action
+            }
+            signature_data.update(data)
+            signature_string, body = _encode(signature_data)
+            signature_bytes = signature_string.encode("utf-8")
 
-        signature_string = '&'.join(items)
+            if not data:
+                prefix = b'_='
+                suffix = signature_bytes[len(prefix) + len(str(tstamp)):]
+                self._sig_template_cache[template_key] = (prefix, suffix)
 
-        sha256 = hashlib.sha256()
-        sha256.update(signature_string.encode("utf-8"))
-        sig = self.key + "." + str(tstamp) + "."
-        sig += base64.b64encode(sha256.digest()).decode("utf-8")
-        return sig
+        digest = hashlib.sha256(signature_bytes).digest()
+        signature = '%s.%d.%s' % (self.key, tstamp, base64.b64encode(digest).decode("ascii"))
+        return signature, body
 
     def getorderbook(self, instrument):
         """ Retrieve the orderbook for a given instrument
@@ -502,3 +796,47 @@ class RestClient(object):
             options["startTradeId"] = startTradeId
 
         return self.request("/api/v1/private/tradehistory", options)
+
+    def place_orders(self, actions):
+        """ Send several private requests concurrently,
+            e.g. to quote both sides of many instruments at once.
+            Requests share the session's pool of kept-alive connections
+            and run in no particular order, so don't batch requests
+            that depend on each other (e.g. an order and its cancel).
+
+        :param actions: ([(str, dict)]) Required, list of (action, data) pairs,
+            e.g. [('/api/v1/private/buy', {...}), ('/api/v1/private/sell', {...})]
+        :return: (list) results, in the same order as actions.
+            a request that failed has its exception in its slot instead,
+            the other requests are still executed
+        """
+        if not actions:
+            return []
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPool(_POOL_SIZE)
+
+        return self._pool.map(self._request_or_error, actions)
+
+    def _request_or_error(self, action_data):
+        """ perform a request, returning instead of raising its error
+
+        :param action_data: ((str, dict)) action and data of the request
+        :return: (str or dict or Exception) json response or the error
+        """
+        try:
+            return self.request(*action_data)
+        except Exception as error:
+            return error
+
+    def close(self):
+        """ release the worker threads of place_orders
+            and the session's connections
+        """
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+        self.session.close()
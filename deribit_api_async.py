@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import ssl
+
+import aiohttp
+import requests
+
+from deribit_api import DeribitAPIError, RestClient
+
+
+class AsyncRestClient(RestClient):
+    """ asyncio client to make requests to Deribit's REST API
+
+        every API method of RestClient is available and returns
+        a coroutine, e.g. `await client.getorderbook('BTC-PERPETUAL')`.
+        requests share one aiohttp session, so independent calls
+        can be awaited concurrently with asyncio.gather
+    """
+
+    def _create_session(self):
+        """ the aiohttp session needs a running event loop,
+            it is created on the first request instead
+
+        :return: None
+        """
+        return None
+
+    async def request(self, action, data):
+        """ perform generic request to the API
+
+        :param action: (str) the suffix of the API endpoint
+            e.g. '/api/v1/public/getcurrencies'
+        :param data: (dict) additional data to pass to this request
+        :return: (str or dict) json response
+        """
+        url, private, ttl = self._route(action)
+
+        cache_key = None
+        if ttl is not None:
+            cache_key = (action, tuple(sorted(data.items())))
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return self._unpack(200, cached)
+
+        if self.session is None:
+            # trust_env picks up HTTP(S)_PROXY, NO_PROXY and .netrc like
+            # the sync client; the CA bundle is resolved by _ssl_context
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, ssl=self._ssl_context()),
+                trust_env=True
+            )
+
+        if private:
+            body, headers = self._prepare_private(action, data)
+            pending = self.session.post(url, data=body, headers=headers)
+        else:
+            pending = self.session.get(url, params=data)
+
+        async with pending as response:
+            if response.status != 200:
+                raise DeribitAPIError(response.status, await response.text())
+
+            content = await response.read()
+
+        result = self._unpack(response.status, content)
+        if cache_key is not None:
+            self._cache_store(cache_key, ttl, content)
+        return result
+
+    @staticmethod
+    def _ssl_context():
+        """ tls context trusting the same CA bundle as RestClient:
+            REQUESTS_CA_BUNDLE or CURL_CA_BUNDLE if set,
+            otherwise the certifi bundle requests ships with
+
+        :return: (ssl.SSLContext)
+        """
+        bundle = (os.environ.get("REQUESTS_CA_BUNDLE") or
+                  os.environ.get("CURL_CA_BUNDLE") or requests.certs.where())
+        if os.path.isdir(bundle):
+            return ssl.create_default_context(capath=bundle)
+        return ssl.create_default_context(cafile=bundle)
+
+    async def close(self):
+        """ close the underlying HTTP session """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def place_orders(self, actions):
+        """ Send several private requests concurrently,
+            e.g. to quote both sides of many instruments at once.
+            Requests run in no particular order, so don't batch requests
+            that depend on each other (e.g. an order and its cancel).
+
+        :param actions: ([(str, dict)]) Required, list of (action, data) pairs,
+            e.g. [('/api/v1/private/buy', {...}), ('/api/v1/private/sell', {...})]
+        :return: (list) results, in the same order as actions.
+            a request that failed has its exception in its slot instead,
+            the other requests are still executed
+        """
+        return await asyncio.gather(
+            *[self.request(action, data) for action, data in actions],
+            return_exceptions=True
+        )
+
+    async def getorderbooks(self, instruments):
+        """ Retrieve the orderbooks for several instruments concurrently
+
+        :param instruments: ([str]) Required, instrument names
+        :return: ([dict]) orderbooks, in the same order as instruments.
+            see RestClient.getorderbook for an example
+        """
+        return await asyncio.gather(*[self.getorderbook(instrument) for instrument in instruments])
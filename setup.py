@@ -4,10 +4,10 @@ https://www.deribit.com/docs/api/
 """
 
 # Always prefer setuptools over distutils
-from setuptools import setup, find_packages
+from setuptools import Extension, setup, find_packages
 # To use a consistent encoding
 from codecs import open
-from os import path
+from os import environ, path
 
 here = path.abspath(path.dirname(__file__))
 
@@ -15,6 +15,16 @@ here = path.abspath(path.dirname(__file__))
 with open(path.join(here, 'README.rst'), encoding='utf-8') as f:
     long_description = f.read()
 
+# Optionally compile the client with Cython to cut per-call interpreter
+# overhead. The pure python module is still installed as a fallback.
+ext_modules = []
+if environ.get('DERIBIT_API_CYTHON'):
+    from Cython.Build import cythonize
+    ext_modules = cythonize(
+        [Extension("deribit_api", ["deribit_api.py"])],
+        compiler_directives={'language_level': 3}
+    )
+
 setup(
     name='deribit_api',
 
@@ -51,8 +61,15 @@ setup(
 
     keywords='deribit api',
 
-    py_modules=["deribit_api"],
+    py_modules=["deribit_api", "deribit_api_async"],
 
     install_requires=['requests'],
 
+    extras_require={
+        'fast': ['orjson'],
+        'async': ['aiohttp'],
+    },
+
+    ext_modules=ext_modules,
+
 )